@@ -7,10 +7,10 @@ from typing import Dict, Optional, Sequence
 
 import numpy as np
 import pandas as pd
+import polars as pl
 
 # We use openpyxl to write an .xlsx and create a Scatter chart inside it.
 from openpyxl import Workbook
-from openpyxl.utils.dataframe import dataframe_to_rows
 from openpyxl.chart import ScatterChart, Reference, Series
 from openpyxl.chart.marker import DataPoint
 
@@ -26,6 +26,81 @@ DEFAULT_TENORS_YEARS: Dict[str, float] = {
     "20 ans": 20,
     "30 ans": 30,
 }
+# Precomputed once: the default tenors are used on every export/plot
+_DEFAULT_LABELS = tuple(DEFAULT_TENORS_YEARS.keys())
+_DEFAULT_TVALS = np.fromiter(
+    DEFAULT_TENORS_YEARS.values(), dtype=np.float64, count=len(DEFAULT_TENORS_YEARS)
+)
+_DEFAULT_TVALS.flags.writeable = False
+
+_CSV_COLUMNS = ["maturity", "col1", "rate", "ref_date"]
+_NUM_PATTERN = r"^[0-9]+(?:\.[0-9]+)?$"
+
+
+def _clean_rates(col: str) -> pl.Expr:
+    """BKAM rate ("3,25 %") -> "3.25": comma to dot, drop % and NBSP."""
+    return (
+        pl.col(col)
+        .str.replace_all(",", ".", literal=True)
+        .str.replace_all("%", "", literal=True)
+        .str.replace_all("\u00A0", "", literal=True)
+        .str.strip_chars()
+    )
+
+
+def _parse_date_series(s: pl.Series) -> pl.Series:
+    # ISO dates are taken as-is: a day-first parse would swap their month/day
+    out = s.str.strptime(pl.Datetime("us"), "%d/%m/%Y", strict=False).fill_null(
+        s.str.strptime(pl.Datetime("us"), "%Y-%m-%d", strict=False)
+    )
+    miss = out.is_null() & s.is_not_null()
+    if miss.any():
+        fallback = pd.to_datetime(
+            s.filter(miss).to_pandas(), format="mixed", dayfirst=True, errors="coerce"
+        )
+        out = out.scatter(miss.arg_true(), pl.from_pandas(fallback).cast(pl.Datetime("us")))
+    return out
+
+
+def _parse_dates(col: str) -> pl.Expr:
+    """
+    Parse BKAM dd/mm/YYYY (or ISO) dates on Polars' fixed-format fast path,
+    falling back to pandas' flexible day-first parser for values that don't match.
+    """
+    return pl.col(col).map_batches(_parse_date_series, return_dtype=pl.Datetime("us"))
+
+
+def _load_curve(csv_path: str) -> pl.DataFrame:
+    """
+    Read BKAM CSV (no header) with Polars and compute time-to-maturity.
+    Returns [maturity, ref_date, ttm_years, rate] sorted by ttm_years; the
+    reference date is taken from the first row with a valid rate.
+    """
+    # Explicit 4-column string schema: short rows (e.g. a preamble line) get
+    # nulls and long rows are truncated, as pandas did with names=[...]
+    df = pl.read_csv(
+        csv_path,
+        has_header=False,
+        schema={c: pl.String for c in _CSV_COLUMNS},
+        missing_columns="insert",
+        truncate_ragged_lines=True,
+    )
+    return (
+        df.with_columns(_clean_rates("rate"))
+        .filter(pl.col("rate").str.contains(_NUM_PATTERN))
+        .select(
+            _parse_dates("maturity").alias("maturity"),
+            _parse_dates("ref_date").first().alias("ref_date"),
+            pl.col("rate").cast(pl.Float64),
+        )
+        .with_columns(
+            ((pl.col("maturity") - pl.col("ref_date")).dt.total_days() / 365.0)
+            .alias("ttm_years")
+        )
+        .drop_nulls("ttm_years")
+        .sort("ttm_years", maintain_order=True)
+        .select("maturity", "ref_date", "ttm_years", "rate")
+    )
 
 
 def _read_and_clean(csv_path: str) -> pd.DataFrame:
@@ -33,65 +108,40 @@ def _read_and_clean(csv_path: str) -> pd.DataFrame:
     Read BKAM CSV (no header) and compute time-to-maturity (years).
     Columns: [maturity, col1, rate, ref_date]
     """
-    df = pd.read_csv(
-        csv_path,
-        header=None,
-        names=["maturity", "col1", "rate", "ref_date"],
-        dtype=str
-    )
+    curve = _load_curve(csv_path).filter(pl.col("ttm_years") >= 0)
 
-    # Clean numeric rate ("3,25%" -> "3.25")
-    df["rate"] = (
-        df["rate"]
-        .astype(str)
-        .str.replace(",", ".", regex=False)
-        .str.replace("%", "", regex=False)
-        .str.replace("\u00A0", "", regex=False)
-        .str.strip()
-    )
-    df = df[df["rate"].str.match(r"^\d+(\.\d+)?$")]
-    df["rate"] = df["rate"].astype(float)
-
-    # Dates
-    df["maturity"] = pd.to_datetime(df["maturity"], dayfirst=True, errors="coerce")
-    ref_date = pd.to_datetime(df["ref_date"].iloc[0], dayfirst=True, errors="coerce")
-
-    # Time to maturity in years
-    df["ttm_years"] = (df["maturity"] - ref_date).dt.days / 365.0
-    df = df.dropna(subset=["ttm_years"]).sort_values("ttm_years")
-    df = df[df["ttm_years"] >= 0]
-
-    # Final tidy columns for Excel
-    out = pd.DataFrame({
-        "MaturityDate": df["maturity"],
-        "RefDate": ref_date,
-        "TTM_Years": df["ttm_years"],
-        "Rate_%": df["rate"],
-    })
-    return out
+    # Final tidy columns for Excel; pandas only from here on
+    return curve.select(
+        pl.col("maturity").alias("MaturityDate"),
+        pl.col("ref_date").alias("RefDate"),
+        pl.col("ttm_years").alias("TTM_Years"),
+        pl.col("rate").alias("Rate_%"),
+    ).to_pandas()
 
 
 def _interpolate_tenors(df: pd.DataFrame, tenors_years: Dict[str, float]) -> pd.DataFrame:
-    """Linear interpolation at standard tenors (in years)."""
+    """
+    Linear interpolation at standard tenors (in years).
+    Expects df sorted by TTM_Years, as returned by _read_and_clean.
+    """
     if df.empty or df["TTM_Years"].nunique() < 2:
         return pd.DataFrame(columns=["TenorLabel", "TenorYears", "Rate_%"])
 
     x = df["TTM_Years"].to_numpy()
     y = df["Rate_%"].to_numpy()
 
-    order = np.argsort(x)
-    x = x[order]
-    y = y[order]
-
-    labels = list(tenors_years.keys())
-    tvals = np.array(list(tenors_years.values()), dtype=float)
+    if tenors_years is DEFAULT_TENORS_YEARS:
+        labels, tvals = _DEFAULT_LABELS, _DEFAULT_TVALS
+    else:
+        labels = list(tenors_years.keys())
+        tvals = np.array(list(tenors_years.values()), dtype=float)
 
     # Clip to data range to avoid extrapolation beyond ends
     tvals_clip = np.clip(tvals, x.min(), x.max())
     y_interp = np.interp(tvals_clip, x, y)
 
     return pd.DataFrame({
-        "TenorLabel": labels,
+        "TenorLabel": list(labels),
         "TenorYears": tvals,
         "Rate_%": y_interp,
     })
@@ -124,6 +174,21 @@ def _nice_axis(min_v: float, max_v: float, target_ticks: int = 6):
     # Recompute span in case rounding expanded range
     return vmin, vmax, step
 
+def _append_frame(ws, df: pd.DataFrame) -> None:
+    """
+    Append df (header + rows) to ws. Columns are converted to Python lists
+    once and zipped into row tuples, bypassing dataframe_to_rows.
+    """
+    cols = list(df.columns)
+    ws.append(cols)
+    # datetime64 .tolist() can yield raw ints; go through object for Timestamps
+    arrays = [
+        df[c].astype(object).tolist() if df[c].dtype.kind == "M" else df[c].tolist()
+        for c in cols
+    ]
+    for row in zip(*arrays):
+        ws.append(row)
+
 def export_yield_curve_to_excel(
     csv_path: str,
     xlsx_target: Optional[str] = None,
@@ -139,10 +204,12 @@ def export_yield_curve_to_excel(
     if data_df.empty:
         raise ValueError("No valid rows after cleaning the CSV.")
 
-    # Optionally convert to fraction for % axis formatting
-    work_df = data_df.copy()
+    # Optionally convert to fraction for % axis formatting; only the rate
+    # column is reallocated, the others share data_df's buffers
     if y_as_percent:
-        work_df["Rate_%"] = work_df["Rate_%"] / 100.0
+        work_df = data_df.assign(**{"Rate_%": data_df["Rate_%"] / 100.0})
+    else:
+        work_df = data_df
 
     tenors_df = _interpolate_tenors(work_df, tenors_years) if include_tenors else pd.DataFrame()
 
@@ -153,18 +220,16 @@ def export_yield_curve_to_excel(
         xlsx_target = os.path.join(base_dir, f"yield_curve_{ts}.xlsx")
     os.makedirs(os.path.dirname(xlsx_target) or ".", exist_ok=True)
 
-    # Workbook + sheets
-    wb = Workbook()
+    # Workbook + sheets. Write-only mode streams rows to disk instead of
+    # building a Cell object per value; charts are still supported.
+    wb = Workbook(write_only=True)
 
-    ws_data = wb.active
-    ws_data.title = "Data"
-    for r in dataframe_to_rows(work_df, index=False, header=True):
-        ws_data.append(r)
+    ws_data = wb.create_sheet("Data")
+    _append_frame(ws_data, work_df)
 
     if include_tenors and not tenors_df.empty:
         ws_ten = wb.create_sheet("Tenors")
-        for r in dataframe_to_rows(tenors_df, index=False, header=True):
-            ws_ten.append(r)
+        _append_frame(ws_ten, tenors_df)
 
     ws_chart = wb.create_sheet("Chart")
 
@@ -198,7 +263,6 @@ def export_yield_curve_to_excel(
     # Tenor points (optional)
     if include_tenors and not tenors_df.empty:
         nrows_t = len(tenors_df) + 1
-        ws_ten = wb["Tenors"]
         x_ref_t = Reference(ws_ten, min_col=2, min_row=2, max_row=nrows_t)  # TenorYears
         y_ref_t = Reference(ws_ten, min_col=3, min_row=2, max_row=nrows_t)  # Rate_%
         series_ten = Series(y_ref_t, xvalues=x_ref_t, title="Tenors (interpolés)")
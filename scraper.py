@@ -1,7 +1,13 @@
-import os, re, sys, hashlib, sqlite3, io
+import os, re, sys, sqlite3, io, atexit, csv, codecs
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from urllib.parse import urljoin
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import xxhash
 from bs4 import BeautifulSoup
+import lxml.html
 import pandas as pd
 
 # -----------------------------
@@ -18,26 +24,49 @@ TELEGRAM_CHAT_ID   = os.environ.get("TG_CHAT_ID")
 
 os.makedirs(OUT_DIR, exist_ok=True)
 
+# -----------------------------
+# HTTP session
+# -----------------------------
+# One pooled session so the page, CSV and Telegram calls reuse connections
+_SESSION = requests.Session()
+_SESSION.headers.update({"User-Agent": USER_AGENT, "Accept-Encoding": "gzip, deflate"})
+_ADAPTER = HTTPAdapter(pool_connections=4, pool_maxsize=4,
+                       max_retries=Retry(total=3, backoff_factor=0.3))
+_SESSION.mount("https://", _ADAPTER)
+_SESSION.mount("http://", _ADAPTER)
+atexit.register(_SESSION.close)
+
 # -----------------------------
 # Notifications
 # -----------------------------
+# Single background worker; shut down (and drained) before the session closes
+_NOTIFY_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix="notify")
+atexit.register(_NOTIFY_POOL.shutdown, wait=True)
+
+def _send_notification(msg: str):
+    try:
+        _SESSION.post(
+            f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage",
+            data={"chat_id": TELEGRAM_CHAT_ID, "text": msg},
+            timeout=15
+        )
+    except Exception:
+        pass
+
 def notify(msg: str):
-    """Send a Telegram notification if credentials exist"""
+    """Queue a Telegram notification if credentials exist; doesn't block"""
     if TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID:
-        try:
-            requests.post(
-                f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage",
-                data={"chat_id": TELEGRAM_CHAT_ID, "text": msg},
-                timeout=15
-            )
-        except Exception:
-            pass
+        _NOTIFY_POOL.submit(_send_notification, msg)
 
 # -----------------------------
 # DB state
 # -----------------------------
 def get_db():
     con = sqlite3.connect(DB_PATH)
+    # WAL + NORMAL sync: commits no longer fsync the main database file
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    con.execute("PRAGMA temp_store=MEMORY")
     con.execute("""CREATE TABLE IF NOT EXISTS seen (
         key TEXT PRIMARY KEY,
         value TEXT,
@@ -50,63 +79,130 @@ def get_seen_hash(con, key: str) -> str | None:
     return row[0] if row else None
 
 def set_seen_hash(con, value: str, key: str):
+    """Caller commits, so several writes share one transaction"""
     con.execute("REPLACE INTO seen(key, value, ts) VALUES(?,?,?)",
                 (key, value, datetime.now(timezone.utc).isoformat()))
-    con.commit()
 
-def sha256_bytes(b: bytes) -> str:
-    return hashlib.sha256(b).hexdigest()
+def content_hash(b: bytes) -> str:
+    """Non-cryptographic digest, only used to detect changed content"""
+    return xxhash.xxh3_128_hexdigest(b)
 
 # -----------------------------
 # Scraping
 # -----------------------------
 def fetch_reference_page() -> str:
     """Fetch BKAM reference page HTML"""
-    r = requests.get(PAGE_URL, headers={"User-Agent": USER_AGENT}, timeout=TIMEOUT)
+    r = _SESSION.get(PAGE_URL, timeout=TIMEOUT)
     r.raise_for_status()
     return r.text
 
+_CSV_RE = re.compile(r"csv", re.IGNORECASE)
+_CSV_EXT_RE = re.compile(r"\.csv\Z", re.IGNORECASE)
+_DOWNLOAD_TEXT_RE = re.compile(r"telechargement|download", re.IGNORECASE)
+
 def extract_csv_url(html: str) -> str | None:
     """Find candidate CSV download link in page HTML"""
     soup = BeautifulSoup(html, "html.parser")
     for a in soup.find_all("a", href=True):
-        text = (a.get_text() or "").strip().lower()
         href = a["href"]
-        if "csv" in href.lower() or "csv" in text:
-            if "telechargement" in text or "download" in text or href.lower().endswith(".csv"):
-                from urllib.parse import urljoin
-                return href if href.startswith("http") else urljoin(PAGE_URL, href)
+        text = a.get_text() or ""
+        if not (_CSV_RE.search(href) or _CSV_RE.search(text)):
+            continue
+        if _CSV_EXT_RE.search(href) or _DOWNLOAD_TEXT_RE.search(text):
+            return href if href.startswith("http") else urljoin(PAGE_URL, href)
     return None
 
-def download_csv(csv_url: str) -> bytes | None:
-    """Try to download CSV and validate"""
-    r = requests.get(csv_url, headers={"User-Agent": USER_AGENT}, timeout=TIMEOUT)
+def download_csv(csv_url: str, etag: str | None = None) -> tuple[bytes, str, str | None] | None:
+    """
+    Stream the CSV, hashing chunks as they arrive, and validate it.
+    Returns (raw_bytes, content hash, ETag), or None if it isn't a CSV.
+    raw_bytes is empty when the server answers 304 Not Modified for `etag`.
+    """
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    with _SESSION.get(csv_url, headers=headers, timeout=TIMEOUT, stream=True) as r:
+        if r.status_code == 304:
+            return b"", "", etag
+        h = xxhash.xxh3_128()
+        buf = bytearray()
+        for chunk in r.iter_content(65536):
+            h.update(chunk)
+            buf.extend(chunk)
+    if not buf:
+        return None
+    raw_bytes = bytes(buf)
+    result = (raw_bytes, h.hexdigest(), r.headers.get("ETag"))
     if r.status_code == 200 and "csv" in r.headers.get("Content-Type","").lower():
-        return r.content
-    head = r.content[:256].decode("utf-8", errors="ignore")
+        return result
+    head = raw_bytes[:256].decode("utf-8", errors="ignore")
     if "," in head or ";" in head:
-        return r.content
+        return result
     return None
 
+def _row_cells(tr) -> list[str]:
+    """Cell texts of a <tr>, repeating colspan cells so columns line up"""
+    cells = []
+    for cell in tr.xpath("./th|./td"):
+        try:
+            span = max(1, int(cell.get("colspan", 1)))
+        except ValueError:
+            span = 1
+        cells.extend([cell.text_content().strip()] * span)
+    return cells
+
 def parse_reference_table(html: str) -> pd.DataFrame:
-    """Fallback: parse HTML table if no CSV available"""
-    dfs = pd.read_html(html, flavor="bs4")
-    dfs.sort(key=lambda df: df.shape[1], reverse=True)
-    return dfs[0]
+    """Fallback: parse the widest HTML table if no CSV available"""
+    tables = lxml.html.fromstring(html).xpath("//table")
+    if not tables:
+        raise ValueError("No tables found")
+    # Expand each table's rows once, then keep the widest (colspans counted)
+    parsed = [[_row_cells(tr) for tr in t.xpath(".//tr")] for t in tables]
+    rows = max(parsed, key=lambda rs: max((len(r) for r in rs), default=0))
+    if not rows:
+        raise ValueError("No tables found")
+    width = max(len(r) for r in rows)
+    # Pad short rows (header included) with None; never drop trailing cells
+    header = rows[0] + [None] * (width - len(rows[0]))
+    body = [r + [None] * (width - len(r)) for r in rows[1:] if r]
+    return pd.DataFrame(body, columns=header)
 
 # -----------------------------
 # Saving
 # -----------------------------
-def save_reference_data(df: pd.DataFrame, raw_bytes: bytes | None, tag: str) -> str:
-    """Save raw + clean CSV, return path of clean file"""
+def _clean_column_name(c) -> str:
+    return re.sub(r"\s+", " ", str(c)).strip()
+
+def _clean_csv_header(raw_bytes: bytes) -> bytes:
+    """
+    Normalise the header row of a raw CSV, leaving the data rows untouched.
+    Output is UTF-8 with BOM, like DataFrame.to_csv(encoding="utf-8-sig").
+    """
+    raw_bytes = raw_bytes.removeprefix(codecs.BOM_UTF8)
+    nl = raw_bytes.find(b"\n")
+    header, rest = (raw_bytes, b"") if nl < 0 else (raw_bytes[:nl], raw_bytes[nl + 1:])
+    eol = "\r\n" if header.endswith(b"\r") else "\n"
+    cells = next(csv.reader([header.decode("utf-8").rstrip("\r")]), [])
+    out = io.StringIO()
+    csv.writer(out, lineterminator=eol).writerow([_clean_column_name(c) for c in cells])
+    return codecs.BOM_UTF8 + out.getvalue().encode("utf-8") + rest
+
+def save_reference_data(df: pd.DataFrame | None, raw_bytes: bytes | None, tag: str) -> str:
+    """
+    Save raw + clean CSV, return path of clean file.
+    With raw_bytes only the header is rewritten; df is serialised otherwise.
+    """
     ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    clean_path = os.path.join(OUT_DIR, f"bkam_clean_{tag}_{ts}.csv")
     if raw_bytes is not None:
         raw_path = os.path.join(OUT_DIR, f"bkam_raw_{tag}_{ts}.csv")
         with open(raw_path, "wb") as f:
             f.write(raw_bytes)
+        with open(clean_path, "wb") as f:
+            f.write(_clean_csv_header(raw_bytes))
+        return clean_path
     clean = df.copy()
-    clean.columns = [re.sub(r"\s+", " ", str(c)).strip() for c in clean.columns]
-    clean_path = os.path.join(OUT_DIR, f"bkam_clean_{tag}_{ts}.csv")
+    clean.columns = [_clean_column_name(c) for c in clean.columns]
     clean.to_csv(clean_path, index=False, encoding="utf-8-sig")
     return clean_path
 
@@ -119,34 +215,49 @@ def update_reference_data(dedupe: bool = True) -> str | None:
     Returns: path to CLEAN CSV if updated, else None.
     """
     con = get_db()
+    try:
+        # State writes share one transaction, committed once on success
+        with con:
+            return _update_reference_data(con, dedupe)
+    finally:
+        con.close()
+
+def _update_reference_data(con, dedupe: bool) -> str | None:
     html = fetch_reference_page()
 
     # Try CSV first
     csv_url = extract_csv_url(html)
     if csv_url:
-        raw_bytes = download_csv(csv_url)
-        if raw_bytes:
-            current_hash = sha256_bytes(raw_bytes)
-            last_hash = get_seen_hash(con, key="reference_csv_hash")
-            if dedupe and last_hash == current_hash:
+        # Only send If-None-Match when deduping: a 304 carries no body to save
+        last_etag = get_seen_hash(con, key="reference_csv_etag") if dedupe else None
+        downloaded = download_csv(csv_url, etag=last_etag)
+        if downloaded:
+            raw_bytes, current_hash, etag = downloaded
+            last_hash = get_seen_hash(con, key="reference_csv_xxh3")
+            if dedupe and (not raw_bytes or last_hash == current_hash):
+                # Same content under a rotated ETag: remember it so the next
+                # run's If-None-Match can still get a 304
+                if etag and etag != last_etag:
+                    set_seen_hash(con, etag, key="reference_csv_etag")
                 print("No change detected (CSV).")
                 return None
-            df = pd.read_csv(io.BytesIO(raw_bytes))
-            clean_path = save_reference_data(df, raw_bytes, tag="csv")
-            set_seen_hash(con, current_hash, key="reference_csv_hash")
+            clean_path = save_reference_data(None, raw_bytes, tag="csv")
+            set_seen_hash(con, current_hash, key="reference_csv_xxh3")
+            if etag:
+                set_seen_hash(con, etag, key="reference_csv_etag")
             notify(f"BKAM T-Bond reference rates UPDATED (CSV). Saved: {clean_path}")
             return clean_path
 
     # Fallback to HTML
     df = parse_reference_table(html)
     table_bytes = df.to_csv(index=False).encode("utf-8")
-    current_hash = sha256_bytes(table_bytes)
-    last_hash = get_seen_hash(con, key="reference_html_hash")
+    current_hash = content_hash(table_bytes)
+    last_hash = get_seen_hash(con, key="reference_html_xxh3")
     if dedupe and last_hash == current_hash:
         print("No change detected (HTML).")
         return None
     clean_path = save_reference_data(df, raw_bytes=None, tag="html")
-    set_seen_hash(con, current_hash, key="reference_html_hash")
+    set_seen_hash(con, current_hash, key="reference_html_xxh3")
     notify(f"BKAM T-Bond reference rates UPDATED (HTML). Saved: {clean_path}")
     return clean_path
 